@@ -1,7 +1,7 @@
 import argparse
 from pathlib import Path
 
-from folder_sync import sync_folders
+from folder_sync import sync_folders, COPY_MODES
 
 
 def cli():
@@ -15,13 +15,19 @@ def cli():
     parser.add_argument("--n_threads", help="Number of threads", type=int, default=100)
     parser.add_argument(
         "--operations_per_thread",
-        help="Number of operations per thread",
+        help="Minimum number of operations passed to a thread at once",
         type=int,
         default=10,
     )
     parser.add_argument("--shallow", help="Shallow compare", action="store_true")
-    parser.add_argument("--verbosity", help="Verbosity level", default=20)
+    parser.add_argument("--verbosity", help="Verbosity level", type=int, default=20)
     parser.add_argument("--quiet", help="Quiet mode", action="store_true")
+    parser.add_argument(
+        "--copy_mode",
+        help="How files are copied, reflink and hardlink fall back to copying if not possible",
+        choices=COPY_MODES,
+        default="copy",
+    )
 
     args = parser.parse_args()
 
@@ -30,9 +36,10 @@ def cli():
         args.destination,
         n_threads=args.n_threads,
         operations_per_thread=args.operations_per_thread,
-        quiet=not args.quiet,
+        quiet=args.quiet,
         shallow_comparison=args.shallow,
         max_logged_paths=args.verbosity,
+        copy_mode=args.copy_mode,
     )
 
 
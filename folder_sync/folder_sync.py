@@ -1,14 +1,31 @@
 from pathlib import Path
-from typing import List, Tuple, Set, Callable, Any, Dict
+from typing import (
+    List,
+    Tuple,
+    Set,
+    Callable,
+    Any,
+    Dict,
+    Optional,
+    Union,
+    ContextManager,
+)
+import os
+import sys
+import errno
 import logging
 import concurrent.futures
+import contextlib
+import itertools
+import math
 import shutil
 import time
-import filecmp
 import enum
-from collections import defaultdict
 
-from tqdm import tqdm
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
 
 
 # we can associate exactly one change to each relative path
@@ -40,15 +57,78 @@ def _chunk_list(l: List[Any], chunk_size: int) -> List[List[Any]]:
     return [l[i : i + chunk_size] for i in range(0, len(l), chunk_size)]
 
 
+def _executer_context(
+    executer: Optional[concurrent.futures.Executor], n_threads: int
+) -> ContextManager[concurrent.futures.Executor]:
+    """Returns a context manager providing the given executer without shutting it down
+    or a new thread pool if no executer is given.
+
+    Args:
+        executer (Optional[concurrent.futures.Executor]): The executer to use, None to create a new one
+        n_threads (int): The number of threads of a newly created thread pool
+
+    Returns:
+        ContextManager[concurrent.futures.Executor]: The context manager providing the executer
+    """
+    if executer is None:
+        return concurrent.futures.ThreadPoolExecutor(max_workers=n_threads)
+    return contextlib.nullcontext(executer)
+
+
+class _NoProgressBar:
+    """Stands in for a tqdm progress bar if no progress is shown."""
+
+    def update(self, n: int):
+        pass
+
+    def __enter__(self) -> "_NoProgressBar":
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+def _progress_bar(total: int) -> ContextManager:
+    """Returns a tqdm progress bar if the output is a terminal. Otherwise (e.g. when logging to a file)
+    no progress is shown and tqdm isnt even imported.
+    The progress bar is only redrawn every few hundred milliseconds or per mille of the data
+    so writing to the terminal doesnt slow down phases with many fast operations.
+
+    Args:
+        total (int): The number of datapoints to process
+
+    Returns:
+        ContextManager: The progress bar providing an update(n) method
+    """
+    if sys.stderr is None or not sys.stderr.isatty():
+        return _NoProgressBar()
+
+    from tqdm import tqdm
+
+    return tqdm(
+        total=total,
+        mininterval=0.25,
+        miniters=max(1, total // 1000),
+        smoothing=0,
+    )
+
+
+# caps the number of chunks an order group is split into at this many per thread,
+# enough to balance the load between the threads while keeping the number of futures small
+_MAX_FUTURES_PER_THREAD = 4
+
+
 def _run_executer_with_progress(
     func: Callable,
     data: List[Tuple[Any]],
     n_threads: int,
     order: List[int] = None,
     datapoints_per_future: int = 1,
-) -> List[List[Any]]:
+    collect_results: bool = True,
+    executer: Optional[concurrent.futures.Executor] = None,
+) -> Optional[List[Any]]:
     """Executes a function in parallel on all data and shows a progress bar which is
-    updaed for each finished task.
+    updated with the finished tasks.
 
     Args:
         n_threads (int): The number of threads to use
@@ -56,255 +136,541 @@ def _run_executer_with_progress(
         data (List[Tuple[Any]]): The data to pass to the function
         order (List[int], optional): The order in which the data should be processed. Defaults to None.
             It is ensured that data with lower order is processed before data with higher order.
-            Data with the same order can be processed in parallel.
-        datapoints_per_future (int, optional): The number of datapoints which are processed in one future/single thread.
+            Data with the same order can be processed in parallel. The orders can be arbitrary ints,
+            dense ranges like folder depths are grouped fastest.
+        datapoints_per_future (int, optional): The minimum number of datapoints which are processed in one future/single thread.
+            More datapoints are processed per future if the data would need more than 4 futures per thread.
+        collect_results (bool, optional): Whether to return the results. Defaults to True.
+        executer (Optional[concurrent.futures.Executor], optional): The executer to run the function on,
+            it is left running so it can be reused. CPU bound functions can be run on a ProcessPoolExecutor
+            if the function and the data can be pickled. Defaults to None which uses a new thread pool with n_threads threads.
+
+    Returns:
+        Optional[List[Any]]: The results in the order of the data, None if collect_results is False
     """
 
     if order is None:
-        order = [0] * len(data)
+        # without an order all data is processed as a single group in its given order
+        ordered_indices = [range(len(data))]
+        ordered_arguments = [data]
+    else:
+        min_order = min(order, default=0)
+        max_order = max(order, default=0)
+        if max_order - min_order < len(order):
+            # dense orders (e.g. folder depths) are distributed to one bucket per value in
+            # their range without hashing
+            n_buckets = max_order - min_order + 1
+            buckets = [ord - min_order for ord in order]
+        else:
+            # sparse orders would leave most buckets of their range empty, so there is one
+            # bucket per distinct order instead
+            bucket_of_order = {ord: i for i, ord in enumerate(sorted(set(order)))}
+            n_buckets = len(bucket_of_order)
+            buckets = [bucket_of_order[ord] for ord in order]
+        ordered_indices = [[] for _ in range(n_buckets)]
+        ordered_arguments = [[] for _ in range(n_buckets)]
+        for idx, (val, bucket) in enumerate(zip(data, buckets)):
+            ordered_indices[bucket].append(idx)
+            ordered_arguments[bucket].append(val)
+
+    final_results = [None] * len(data) if collect_results else None
+    max_futures = n_threads * _MAX_FUTURES_PER_THREAD
+
+    with _progress_bar(len(data)) as pbar, _executer_context(
+        executer, n_threads
+    ) as executer:
+        for indices, arguments in zip(ordered_indices, ordered_arguments):
+            # large amounts of data are split into at most max_futures chunks instead of many
+            # small ones, this keeps the number of futures of a group independent of the data
+            # so all of them can be submitted at once
+            chunk_size = max(
+                datapoints_per_future, math.ceil(len(indices) / max_futures)
+            )
 
-    ordered_data = defaultdict(list)
-    for idx, (val, ord) in enumerate(zip(data, order)):
-        ordered_data[ord].append((idx, val))
+            # maps each pending future to the indices of its datapoints so results can be stored
+            # (and the future released) as soon as it is done
+            pending_futures = {
+                executer.submit(_sequential_execution, func, arg_chunk): idx_chunk
+                for idx_chunk, arg_chunk in zip(
+                    _chunk_list(indices, chunk_size), _chunk_list(arguments, chunk_size)
+                )
+            }
+            while pending_futures:
+                done_futures, _ = concurrent.futures.wait(
+                    pending_futures, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                n_done = 0
+                for fut in done_futures:
+                    chunk_results = fut.result()
+                    idx_chunk = pending_futures.pop(fut)
+                    if collect_results:
+                        for idx, result in zip(idx_chunk, chunk_results):
+                            final_results[idx] = result
+                    n_done += len(chunk_results)
+                pbar.update(n_done)
 
-    final_results = [None] * len(data)
+    return final_results
 
-    with tqdm(total=len(data)) as pbar:
-        for ord, indexed_data in sorted(ordered_data.items()):
-            indices, arguments = zip(*indexed_data)
-            argument_chunks = _chunk_list(arguments, datapoints_per_future)
 
-            executer = concurrent.futures.ThreadPoolExecutor(max_workers=n_threads)
-            chunk_futures = [
-                executer.submit(_sequential_execution, func, arg_chunk)
-                for arg_chunk in argument_chunks
-            ]
+def _list_folder(folder: str) -> List[os.DirEntry]:
+    with os.scandir(folder) as it:
+        return list(it)
 
-            for fut in concurrent.futures.as_completed(chunk_futures):
-                pbar.update(len(fut.result()))
 
-            ord_results = [r for fut in chunk_futures for r in fut.result()]
-            executer.shutdown(wait=True)
+def _scan_folder(
+    folder: Path,
+    n_threads: int = 1,
+    executer: Optional[concurrent.futures.Executor] = None,
+) -> Tuple[Dict[str, os.DirEntry], Dict[str, os.DirEntry]]:
+    """Lists all paths inside a folder (like folder.rglob("*")) in a single os.scandir based walk
+    and separates the paths which are neither files nor folders.
+    The returned DirEntry objects cache the file type reported by the directory listing,
+    so checking whether a path is a file or a folder does not need another stat call.
+    The folder is walked level by level and all folders of a level are listed in parallel.
 
-            for idx, result in zip(indices, ord_results):
-                final_results[idx] = result
+    Args:
+        folder (Path): The folder to scan
+        n_threads (int, optional): The number of threads listing folders. Defaults to 1.
+        executer (Optional[concurrent.futures.Executor], optional): The executer listing the folders.
+            Defaults to None which uses a new thread pool with n_threads threads.
 
-    return final_results
+    Returns:
+        Tuple[Dict[str, os.DirEntry], Dict[str, os.DirEntry]]: The valid and the invalid entries
+            mapped to their path relative to the folder
+    """
+    entries = {}
+    invalid_entries = {}
+    with _executer_context(executer, n_threads) as executer:
+        # the relative paths are plain strings as they are hashed and compared a lot
+        rel_prefixes = [""]
+        listings = [_list_folder(os.fspath(folder))]
+        while rel_prefixes:
+            next_rel_prefixes = []
+            next_folders = []
+            for rel_prefix, listing in zip(rel_prefixes, listings):
+                for entry in listing:
+                    rel_path = rel_prefix + entry.name
+                    if not entry.is_file() and not entry.is_dir():
+                        invalid_entries[rel_path] = entry
+                        continue
+                    entries[rel_path] = entry
+                    # like rglob we list symlinked folders but do not descend into them
+                    if entry.is_dir(follow_symlinks=False):
+                        next_rel_prefixes.append(rel_path + os.sep)
+                        next_folders.append(entry.path)
+            rel_prefixes = next_rel_prefixes
+            listings = executer.map(_list_folder, next_folders)
+
+    return entries, invalid_entries
 
 
 def _handle_invlid_types(
-    source_paths: Set[Path], target_paths: Set[Path], quiet: bool
-) -> Tuple[Set[Path], Set[Path]]:
-    """Checks if the paths are valid (i.e. if they are files or directories) and
-    asks the user if he wants to continue if there are invalid paths.
+    invalid_source_entries: Dict[str, os.DirEntry],
+    invalid_target_entries: Dict[str, os.DirEntry],
+    quiet: bool,
+):
+    """Reports the invalid paths (i.e. paths which are neither files nor directories) and
+    asks the user if he wants to continue if there are invalid paths in the target folder.
     Invalid paths are deleted from the target folder.
 
     Args:
-        source_paths (Set[Path]): The paths in the source folder
-        target_paths (Set[Path]): The paths in the target folder
+        invalid_source_entries (Dict[str, os.DirEntry]): The invalid entries in the source folder
+        invalid_target_entries (Dict[str, os.DirEntry]): The invalid entries in the target folder
         quiet (bool): If True, the user wont be asked if he wants to continue.
-
-    Returns:
-        Tuple[Set[Path], Set[Path]]: The invalid paths in the source and target folder
     """
-    invalid_source_paths = {
-        p for p in source_paths if not p.is_file() and not p.is_dir()
-    }
-    if invalid_source_paths:
+    if invalid_source_entries:
         logging.warning(
             "The following paths are neither files or directories and therefore wont be synced"
         )
-        for p in invalid_source_paths:
-            logging.warning(p)
+        for e in invalid_source_entries.values():
+            logging.warning(e.path)
 
-    invalid_target_paths = {
-        p for p in target_paths if not p.is_file() and not p.is_dir()
-    }
-    if invalid_target_paths:
+    if invalid_target_entries:
         logging.warning(
             "The following paths in the target folder are neither files or directories. The tool cant handle them so they need to be removed before continuing."
         )
-        for p in invalid_target_paths:
-            logging.warning(p)
+        for e in invalid_target_entries.values():
+            logging.warning(e.path)
         logging.warning("Do you want to continue?")
         if not quiet:
             if input("y/n: ") != "y":
                 logging.info("Aborting...")
                 exit()
-        for p in invalid_target_paths:
-            # try:
-            p.unlink()
-            # except OSError as e:
-            #     logging.fatal(f"Couldnt delete {p}")
-            #     raise e
+        for e in invalid_target_entries.values():
+            os.unlink(e.path)
+
 
-    return invalid_source_paths, invalid_target_paths
+# filecmp compares in 8 KiB blocks, which means hundreds of interpreter round trips per
+# megabyte. Larger blocks keep the comparison of big files mostly inside C.
+_COMPARE_BUFFER_SIZE = 1024 * 1024
+
+
+def _compare_file_contents(
+    source_path: Union[str, Path], target_path: Union[str, Path]
+) -> bool:
+    """Compares the contents of two files block by block.
+
+    Args:
+        source_path (Union[str, Path]): The first file
+        target_path (Union[str, Path]): The second file
+
+    Returns:
+        bool: Whether the contents of both files are identical
+    """
+    with open(source_path, "rb") as source_file, open(target_path, "rb") as target_file:
+        if hasattr(os, "posix_fadvise"):
+            # the files are read alternately, letting the kernel read both ahead in the
+            # background overlaps their IO instead of waiting for each block in turn
+            for f in (source_file, target_file):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        while True:
+            source_block = source_file.read(_COMPARE_BUFFER_SIZE)
+            if source_block != target_file.read(_COMPARE_BUFFER_SIZE):
+                return False
+            if not source_block:
+                return True
+
+
+def _files_equal(
+    source_path: Union[str, Path],
+    target_path: Union[str, Path],
+    shallow_comparison: bool,
+    source_stat: Optional[os.stat_result] = None,
+    target_stat: Optional[os.stat_result] = None,
+) -> bool:
+    """Checks whether two files are equal. Behaves like filecmp.cmp without its cache:
+    for a shallow comparison files with identical size and modification time are considered
+    equal, files with different sizes are never equal and otherwise the contents are compared.
+
+    Args:
+        source_path (Union[str, Path]): The file in the source folder
+        target_path (Union[str, Path]): The file in the target folder
+        shallow_comparison (bool): Whether to trust identical sizes and modification times
+        source_stat (Optional[os.stat_result], optional): The already known stat of the source file. Defaults to None.
+        target_stat (Optional[os.stat_result], optional): The already known stat of the target file. Defaults to None.
+
+    Returns:
+        bool: Whether the files are equal
+    """
+    if source_stat is None:
+        source_stat = os.stat(source_path)
+    if target_stat is None:
+        target_stat = os.stat(target_path)
+
+    if source_stat.st_size != target_stat.st_size:
+        return False
+    if shallow_comparison and source_stat.st_mtime_ns == target_stat.st_mtime_ns:
+        return True
+    return _compare_file_contents(source_path, target_path)
+
+
+# maps whether a path is a file in the source and in the target folder (None if it does not exist)
+# to its change, all other paths are folders since invalid types are sorted out while scanning
+_KIND_CHANGES = {
+    (None, True): Change.REMOVED_FILE,
+    (None, False): Change.REMOVED_FOLDER,
+    (True, None): Change.NEW_FILE,
+    (False, None): Change.NEW_FOLDER,
+    (True, False): Change.CHANGED_FOLDER2FILE,
+    (False, True): Change.CHANGED_FILE2FOLDER,
+    (False, False): Change.UNCHANGED_FOLDER,
+}
 
 
 def _determine_change(
-    rel_path: Path,
-    source_folder: Path,
-    target_folder: Path,
+    source_entry: Optional[os.DirEntry],
+    target_entry: Optional[os.DirEntry],
     shallow_comparison: bool,
-    in_source: bool,
-    in_target: bool,
 ) -> Change:
     """Determines the change of a file in the target folder for a given relative path.
+    The file types are taken from the cached directory entries, only files which exist
+    in both folders are accessed for the comparison.
 
     Args:
-        rel_path (Path): The relative path of the file
-        source_folder (Path): The source folder
-        target_folder (Path): The target folder
+        source_entry (Optional[os.DirEntry]): The entry in the source folder, None if the path is not in the source folder
+        target_entry (Optional[os.DirEntry]): The entry in the target folder, None if the path is not in the target folder
         shallow_comparison (bool): Whether to use a shallow comparison for files
-        in_source (bool): Whether the file is in the source folder
-        in_target (bool): Whether the file is in the target folder
 
     Returns:
         Change: The type of change of the file
     """
-    source_path = source_folder / rel_path
-    target_path = target_folder / rel_path
-
-    if not in_source and in_target:
-        if target_path.is_file():
-            return Change.REMOVED_FILE
-        elif target_path.is_dir():
-            return Change.REMOVED_FOLDER
-        else:
-            assert False, "There shouldnt be any paths which arent files or folder"
+    kinds = (
+        None if source_entry is None else source_entry.is_file(),
+        None if target_entry is None else target_entry.is_file(),
+    )
+    if kinds != (True, True):
+        return _KIND_CHANGES[kinds]
 
-    if in_source and not in_target:
-        if source_path.is_file():
-            return Change.NEW_FILE
-        elif source_path.is_dir():
-            return Change.NEW_FOLDER
-        else:
-            assert False, "There shouldnt be any paths which arent files or folder"
-
-    if in_source and in_target:
-        if source_path.is_file() and target_path.is_file():
-            if filecmp.cmp(source_path, target_path, shallow_comparison):
-                return Change.UNCHANGED_FILE
-            else:
-                return Change.CHANGED_FILE
-        elif source_path.is_file() and target_path.is_dir():
-            return Change.CHANGED_FOLDER2FILE
-        elif source_path.is_dir() and target_path.is_file():
-            return Change.CHANGED_FILE2FOLDER
-        elif source_path.is_dir() and target_path.is_dir():
-            return Change.UNCHANGED_FOLDER
-        else:
-            assert False, "There shouldnt be any paths which arent files or folder"
+    if _files_equal(
+        source_entry.path,
+        target_entry.path,
+        shallow_comparison,
+        source_entry.stat(),
+        target_entry.stat(),
+    ):
+        return Change.UNCHANGED_FILE
+    return Change.CHANGED_FILE
 
 
 def _get_changes(
     n_threads: int,
     operations_per_thread: int,
-    source_folder: Path,
-    target_folder: Path,
     shallow_comparison: bool,
-    source_paths_rel: Set[Path],
-    target_paths_rel: Set[Path],
-) -> Dict[Change, Set[Path]]:
+    source_entries: Dict[str, os.DirEntry],
+    target_entries: Dict[str, os.DirEntry],
+    executer: Optional[concurrent.futures.Executor] = None,
+) -> Dict[Change, Set[str]]:
     """Determines the changes of all files in the target folder and returns them as a dictionary mapped to the change type.
-    Execution is parallelized.
+    The comparison of files which are in both folders is parallelized.
 
     Args:
         n_threads (int): The number of threads to use
-        source_folder (Path): The source folder
-        target_folder (Path): The target folder
         shallow_comparison (bool): Whether to use a shallow comparison for files
-        source_paths_rel (Set[Path]): The relative paths of the files in the source folder
-        target_paths_rel (Set[Path]): The relative paths of the files in the target folder
+        source_entries (Dict[str, os.DirEntry]): The entries in the source folder mapped to their relative paths
+        target_entries (Dict[str, os.DirEntry]): The entries in the target folder mapped to their relative paths
+        executer (Optional[concurrent.futures.Executor], optional): The executer to use. Defaults to None.
 
     Returns:
-        Dict[Change, Set[Path]]: A dictionary mapping the change type to the relative paths of the files with that change
+        Dict[Change, Set[str]]: A dictionary mapping the change type to the relative paths of the files with that change
     """
-    all_paths_rel = list(source_paths_rel | target_paths_rel)
-    change_results = _run_executer_with_progress(
-        _determine_change,
-        [
-            (
-                rel_path,
-                source_folder,
-                target_folder,
-                shallow_comparison,
-                rel_path in source_paths_rel,
-                rel_path in target_paths_rel,
-            )
-            for rel_path in all_paths_rel
-        ],
+    changes = {c: set() for c in Change}
+
+    def add_change(rel_path: str):
+        # the paths are added to their change set right away instead of collecting
+        # a list of results which would have to be sorted into the sets afterwards
+        change_type = _determine_change(
+            source_entries.get(rel_path),
+            target_entries.get(rel_path),
+            shallow_comparison,
+        )
+        changes[change_type].add(rel_path)
+
+    # paths which are only in one folder or which are not files in both folders are classified
+    # by their cached file types right away, only the files in both folders need to be
+    # compared (which requires stat calls or reading them) which is done in parallel
+    for rel_path in source_entries.keys() ^ target_entries.keys():
+        add_change(rel_path)
+    compared_paths = []
+    for rel_path in source_entries.keys() & target_entries.keys():
+        if source_entries[rel_path].is_file() and target_entries[rel_path].is_file():
+            compared_paths.append(rel_path)
+        else:
+            add_change(rel_path)
+
+    _run_executer_with_progress(
+        add_change,
+        [(rel_path,) for rel_path in compared_paths],
         n_threads,
         datapoints_per_future=operations_per_thread,
+        collect_results=False,
+        executer=executer,
     )
-    changes = {c: set() for c in Change}
-    for change_type, rel_path in zip(change_results, all_paths_rel):
-        changes[change_type].add(rel_path)
 
     return changes
 
 
-def _infer_actions(changes: Dict[Change, Set[Path]]) -> Dict[Action, Set[Path]]:
+# errors with which copy_file_range signals that it cant be used for the given files
+_COPY_FILE_RANGE_UNSUPPORTED = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+    errno.EPERM,
+}
+_COPY_CHUNK_SIZE = 1024 * 1024 * 1024
+_DROP_CACHE_MIN_FILE_SIZE = 64 * 1024 * 1024
+
+
+def _copy_file_range(
+    source_path: Union[str, Path], target_path: Union[str, Path]
+) -> bool:
+    """Copies the contents of a file with os.copy_file_range. The data is copied inside the kernel
+    without passing through user space and filesystems which support it can share the data
+    blocks (btrfs, XFS) or copy on the server (NFS).
+
+    Args:
+        source_path (Union[str, Path]): The file to copy
+        target_path (Union[str, Path]): The file to create or overwrite
+
+    Returns:
+        bool: False if copy_file_range is not supported for these files and nothing has been copied
+    """
+    if not hasattr(os, "copy_file_range"):
+        return False
+
+    with open(source_path, "rb") as source_file, open(target_path, "wb") as target_file:
+        if hasattr(os, "posix_fadvise"):
+            # the source is read once from start to end, this allows a larger readahead
+            os.posix_fadvise(source_file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        try:
+            while os.copy_file_range(
+                source_file.fileno(), target_file.fileno(), _COPY_CHUNK_SIZE
+            ):
+                pass
+        except OSError as e:
+            if e.errno in _COPY_FILE_RANGE_UNSUPPORTED and target_file.tell() == 0:
+                return False
+            raise
+
+        if target_file.tell() == 0 and os.fstat(source_file.fileno()).st_size > 0:
+            # some filesystems (procfs, sysfs, FUSE, older kernels across filesystems) report
+            # the end of the file instead of an error, the file is copied by other means then
+            return False
+
+        if (
+            hasattr(os, "posix_fadvise")
+            and target_file.tell() >= _DROP_CACHE_MIN_FILE_SIZE
+        ):
+            # a large file which has just been copied wont be read again soon, dropping its
+            # pages from the page cache keeps it from evicting the cached metadata and other data
+            for f in (source_file, target_file):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+    return True
+
+
+# ioctl request of Linux which lets a file share all data blocks of another file (copy on write)
+_FICLONE = 0x40049409
+# errors with which the FICLONE ioctl signals that the filesystem cant share the data blocks
+_REFLINK_UNSUPPORTED = _COPY_FILE_RANGE_UNSUPPORTED | {errno.ENOTTY}
+# errors with which os.link signals that the files cant be hardlinked
+_HARDLINK_UNSUPPORTED = {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.EOPNOTSUPP}
+
+COPY_MODES = ("copy", "reflink", "hardlink")
+
+
+def _reflink_file(source_path: Union[str, Path], target_path: Union[str, Path]) -> bool:
+    """Creates a copy on write clone of a file (reflink) which shares the data blocks of the source file.
+    This takes constant time independent of the file size but is only supported by some
+    filesystems (e.g. btrfs, XFS) and for files on the same filesystem.
+
+    Args:
+        source_path (Union[str, Path]): The file to clone
+        target_path (Union[str, Path]): The file to create or overwrite
+
+    Returns:
+        bool: False if reflinks are not supported for these files and nothing has been copied
+    """
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+
+    with open(source_path, "rb") as source_file, open(target_path, "wb") as target_file:
+        try:
+            fcntl.ioctl(target_file.fileno(), _FICLONE, source_file.fileno())
+        except OSError as e:
+            if e.errno in _REFLINK_UNSUPPORTED:
+                return False
+            raise
+
+    return True
+
+
+def _copy_file(
+    source_path: Union[str, Path],
+    target_path: Union[str, Path],
+    copy_mode: str = "copy",
+):
+    """Copies a file including its metadata, like shutil.copy2.
+    Uses copy_file_range where possible and falls back to shutil.copyfile (which uses sendfile on Linux).
+    With the "reflink" mode the file is cloned if the filesystem supports it and with the "hardlink" mode
+    the target becomes a hardlink to the source file. Both fall back to a normal copy if the files
+    are on different filesystems or the filesystem doesnt support it.
+
+    Args:
+        source_path (Union[str, Path]): The file to copy
+        target_path (Union[str, Path]): The file to create (or overwrite unless hardlinking)
+        copy_mode (str, optional): One of COPY_MODES. Defaults to "copy".
+    """
+    if copy_mode == "hardlink":
+        try:
+            os.link(source_path, target_path)
+            return
+        except OSError as e:
+            if e.errno not in _HARDLINK_UNSUPPORTED:
+                raise
+
+    if copy_mode == "reflink" and _reflink_file(source_path, target_path):
+        pass
+    elif not _copy_file_range(source_path, target_path):
+        shutil.copyfile(source_path, target_path)
+    shutil.copystat(source_path, target_path)
+
+
+def _create_folder(path: str):
+    """Creates a folder whose parent exists, like os.makedirs with exist_ok=True but with a
+    single syscall. The scan does not follow symlinked folders in the target, so a new folder
+    can already exist below such a link.
+
+    Args:
+        path (str): The folder to create
+    """
+    try:
+        os.mkdir(path)
+    except FileExistsError:
+        if not os.path.isdir(path):
+            raise
+
+
+# maps each change to the actions which make the target folder identical to the source folder
+_CHANGE_ACTIONS = {
+    Change.NEW_FILE: (Action.COPY_FILE,),
+    Change.NEW_FOLDER: (Action.CREATE_FOLDER,),
+    Change.CHANGED_FILE: (Action.DELETE_FILE, Action.COPY_FILE),
+    Change.CHANGED_FILE2FOLDER: (Action.DELETE_FILE, Action.CREATE_FOLDER),
+    Change.CHANGED_FOLDER2FILE: (Action.DELETE_FOLDER, Action.COPY_FILE),
+    Change.UNCHANGED_FILE: (),
+    Change.REMOVED_FILE: (Action.DELETE_FILE,),
+    Change.REMOVED_FOLDER: (Action.DELETE_FOLDER,),
+    Change.UNCHANGED_FOLDER: (),
+}
+
+
+def _infer_actions(changes: Dict[Change, Set[str]]) -> Dict[Action, Set[str]]:
     """Infers the actions to be taken for each change type.
 
     Args:
-        changes (Dict[Change, Set[Path]]): A dictionary mapping the change type to the relative paths of the files with that change
+        changes (Dict[Change, Set[str]]): A dictionary mapping the change type to the relative paths of the files with that change
 
     Returns:
-        Dict[Action, Set[Path]]: A dictionary mapping the action type to the relative paths of the files with that action
+        Dict[Action, Set[str]]: A dictionary mapping the action type to the relative paths of the files with that action
     """
     actions = {e: set() for e in Action}
     for change_type, paths in changes.items():
-        if change_type == Change.REMOVED_FILE:
-            actions[Action.DELETE_FILE].update(paths)
-        elif change_type == Change.REMOVED_FOLDER:
-            actions[Action.DELETE_FOLDER].update(paths)
-        elif change_type == Change.NEW_FILE:
-            actions[Action.COPY_FILE].update(paths)
-        elif change_type == Change.NEW_FOLDER:
-            actions[Action.CREATE_FOLDER].update(paths)
-        elif change_type == Change.CHANGED_FILE:
-            actions[Action.DELETE_FILE].update(paths)
-            actions[Action.COPY_FILE].update(paths)
-        elif change_type == Change.CHANGED_FILE2FOLDER:
-            actions[Action.DELETE_FILE].update(paths)
-            actions[Action.CREATE_FOLDER].update(paths)
-        elif change_type == Change.CHANGED_FOLDER2FILE:
-            actions[Action.DELETE_FOLDER].update(paths)
-            actions[Action.COPY_FILE].update(paths)
+        for action in _CHANGE_ACTIONS[change_type]:
+            actions[action].update(paths)
 
     return actions
 
 
-def _capped_path_list(paths: Set[Path], max_lines: int) -> str:
+def _capped_path_list(paths: Set[str], max_lines: int) -> str:
     """Returns a string representation of the paths, capped at max_lines.
 
     Args:
-        paths (Set[Path]): The paths
+        paths (Set[str]): The paths
         max_lines (int): The maximum number of lines
 
     Returns:
         str: The string representation of the paths
     """
-    paths = list(paths)
     if max_lines < 0:
         max_lines = len(paths)
-    return "\n".join([str(p) for p in paths[:max_lines]]) + (
+    # only the logged paths are taken from the set instead of copying all of them to a list
+    return "\n".join(itertools.islice(paths, max_lines)) + (
         "\n..." if len(paths) > max_lines else ""
     )
 
 
 def _log_actions(
-    actions: Dict[Change, Set[Path]],
-    changes: Dict[Action, Set[Path]],
+    actions: Dict[Change, Set[str]],
+    changes: Dict[Action, Set[str]],
     max_lines: int,
     quiet: bool,
 ):
     """Logs the actions and changes to be taken and asks the user for confirmation.
 
     Args:
-        actions (Dict[Change, Set[Path]]): A dictionary mapping the action type to the relative paths of the files with that action
-        changes (Dict[Action, Set[Path]]): A dictionary mapping the change type to the relative paths of the files with that change
+        actions (Dict[Change, Set[str]]): A dictionary mapping the action type to the relative paths of the files with that action
+        changes (Dict[Action, Set[str]]): A dictionary mapping the change type to the relative paths of the files with that change
         max_lines (int): The maximum number of lines to print
         quiet (bool): Whether to skip the confirmation.
     """
@@ -351,6 +717,24 @@ def _log_actions(
             exit()
 
 
+def _in_inode_order(paths: Set[str], entries: Dict[str, os.DirEntry]) -> List[str]:
+    """Sorts paths by the inode numbers of their entries, which mostly matches their order on disk.
+    The inode numbers are cached from the directory listing on POSIX only, on other
+    platforms every inode() call needs a system call so the paths are not sorted there.
+
+    Args:
+        paths (Set[str]): The relative paths to sort
+        entries (Dict[str, os.DirEntry]): The entries of the relative paths
+
+    Returns:
+        List[str]: The sorted paths
+    """
+    if os.name != "posix":
+        return list(paths)
+
+    return sorted(paths, key=lambda p: entries[p].inode())
+
+
 def sync_folders(
     source_folder: Path,
     target_folder: Path,
@@ -359,6 +743,7 @@ def sync_folders(
     shallow_comparison: bool = True,
     max_logged_paths: int = -1,
     quiet: bool = False,
+    copy_mode: str = "copy",
 ):
     """Syncs two folders. This means the target folder will be made identical to the source folder.
     Identical files will be untouched, files that are only in the source folder will be copied to the target folder,
@@ -369,10 +754,16 @@ def sync_folders(
         source_folder (Path): The path to the source folder
         target_folder (Path): The path to the target folder
         n_threads (int, optional): The number of threads to use for the comparison. Defaults to 1.
-        operations_per_thread (int, optional): The number of operations to perform per thread. Defaults to 10.
+        operations_per_thread (int, optional): The minimum number of operations which are passed to a thread at once.
+            Larger amounts of operations are split into at most 4 chunks per thread instead. Defaults to 10.
         shallow_comparison (bool, optional): Whether to only compare the file sizes and modification times. Defaults to True.
         max_logged_paths (bool, optional): The maximum number of paths to log. If negative, all paths will be logged. Defaults to -1.
         quiet (bool, optional): Whether to ask the user for confirmation. Defaults to False.
+        copy_mode (str, optional): How new and changed files are copied, one of COPY_MODES. Defaults to "copy".
+            "reflink" clones the files on filesystems with copy on write support (e.g. btrfs, XFS).
+            "hardlink" links the files in the target folder to the source files without copying any data,
+            changing a file in one folder therefore also changes it in the other folder.
+            Both modes fall back to copying if they are not possible.
     """
     logging.info(f"Syncing {source_folder} to {target_folder}")
     if not source_folder.exists():
@@ -381,76 +772,100 @@ def sync_folders(
     if not target_folder.exists():
         logging.error(f"{target_folder} does not exist.")
         exit()
+    if copy_mode not in COPY_MODES:
+        logging.error(f"Unknown copy mode {copy_mode}, use one of {COPY_MODES}.")
+        exit()
+    if (
+        copy_mode != "copy"
+        and source_folder.stat().st_dev != target_folder.stat().st_dev
+    ):
+        logging.warning(
+            f"{source_folder} and {target_folder} are on different filesystems, files will be copied."
+        )
     start_time = time.time()
 
-    logging.info("Detecting paths...")
-    source_paths = set(source_folder.rglob("*"))
-    target_paths = set(target_folder.rglob("*"))
-
-    logging.info("Checking for invalid types")
-    invalid_source_paths, invalid_target_paths = _handle_invlid_types(
-        source_paths, target_paths, quiet
-    )
-    source_paths = source_paths - invalid_source_paths
-    target_paths = target_paths - invalid_target_paths
-
-    logging.info("Making relative paths...")
-    source_paths_rel = {p.relative_to(source_folder) for p in source_folder.rglob("*")}
-    target_paths_rel = {p.relative_to(target_folder) for p in target_folder.rglob("*")}
-
-    logging.info("Determining changes...")
-    changes: Dict[Change, Set[Path]] = _get_changes(
-        n_threads,
-        operations_per_thread,
-        source_folder,
-        target_folder,
-        shallow_comparison,
-        source_paths_rel,
-        target_paths_rel,
-    )
-
-    logging.info("Inferring actions...")
-    actions: Dict[Action, Set[Path]] = _infer_actions(changes)
-
-    logging.info("The following actions will be applied on the target folder:")
-    _log_actions(actions, changes, max_logged_paths, quiet)
+    # all phases share one thread pool instead of starting new threads for each of them
+    with concurrent.futures.ThreadPoolExecutor(max_workers=n_threads) as executer:
+        logging.info("Detecting paths...")
+        source_entries, invalid_source_entries = _scan_folder(
+            source_folder, n_threads, executer
+        )
+        target_entries, invalid_target_entries = _scan_folder(
+            target_folder, n_threads, executer
+        )
 
-    logging.info("Applying changes...")
+        logging.info("Checking for invalid types")
+        _handle_invlid_types(invalid_source_entries, invalid_target_entries, quiet)
+
+        logging.info("Determining changes...")
+        changes: Dict[Change, Set[str]] = _get_changes(
+            n_threads,
+            operations_per_thread,
+            shallow_comparison,
+            source_entries,
+            target_entries,
+            executer,
+        )
 
-    logging.info("Deleting files...")
-    _run_executer_with_progress(
-        lambda rel_path: (target_folder / rel_path).unlink(),
-        [(p,) for p in actions[Action.DELETE_FILE]],
-        n_threads,
-        datapoints_per_future=operations_per_thread,
-    )
+        logging.info("Inferring actions...")
+        actions: Dict[Action, Set[str]] = _infer_actions(changes)
+
+        logging.info("The following actions will be applied on the target folder:")
+        _log_actions(actions, changes, max_logged_paths, quiet)
+
+        logging.info("Applying changes...")
+        # joining strings is a lot cheaper than building Path objects for every operation
+        source_prefix = os.path.join(source_folder, "")
+        target_prefix = os.path.join(target_folder, "")
+
+        logging.info("Deleting files...")
+        _run_executer_with_progress(
+            lambda rel_path: os.unlink(target_prefix + rel_path),
+            [
+                (p,)
+                for p in _in_inode_order(actions[Action.DELETE_FILE], target_entries)
+            ],
+            n_threads,
+            datapoints_per_future=operations_per_thread,
+            collect_results=False,
+            executer=executer,
+        )
 
-    logging.info("Deleting (now empty) folders...")
-    _run_executer_with_progress(
-        lambda rel_path: (target_folder / rel_path).rmdir(),
-        [(p,) for p in actions[Action.DELETE_FOLDER]],
-        n_threads,
-        order=[-len(p.parts) for p in actions[Action.DELETE_FOLDER]],
-        datapoints_per_future=operations_per_thread,
-    )
+        logging.info("Deleting (now empty) folders...")
+        _run_executer_with_progress(
+            lambda rel_path: os.rmdir(target_prefix + rel_path),
+            [(p,) for p in actions[Action.DELETE_FOLDER]],
+            n_threads,
+            order=[-p.count(os.sep) for p in actions[Action.DELETE_FOLDER]],
+            datapoints_per_future=operations_per_thread,
+            collect_results=False,
+            executer=executer,
+        )
 
-    logging.info("Creating folders...")
-    _run_executer_with_progress(
-        lambda rel_path: (target_folder / rel_path).mkdir(parents=True, exist_ok=True),
-        [(a,) for a in actions[Action.CREATE_FOLDER]],
-        n_threads,
-        datapoints_per_future=operations_per_thread,
-    )
+        logging.info("Creating folders...")
+        # the parents of a new folder are either already present or new folders themselves,
+        # creating folders level by level avoids the redundant mkdir calls of makedirs
+        _run_executer_with_progress(
+            lambda rel_path: _create_folder(target_prefix + rel_path),
+            [(a,) for a in actions[Action.CREATE_FOLDER]],
+            n_threads,
+            order=[p.count(os.sep) for p in actions[Action.CREATE_FOLDER]],
+            datapoints_per_future=operations_per_thread,
+            collect_results=False,
+            executer=executer,
+        )
 
-    logging.info("Copying files...")
-    _run_executer_with_progress(
-        lambda rel_path: shutil.copy2(
-            source_folder / rel_path, target_folder / rel_path
-        ),
-        [(a,) for a in actions[Action.COPY_FILE]],
-        n_threads,
-        datapoints_per_future=operations_per_thread,
-    )
+        logging.info("Copying files...")
+        _run_executer_with_progress(
+            lambda rel_path: _copy_file(
+                source_prefix + rel_path, target_prefix + rel_path, copy_mode
+            ),
+            [(a,) for a in _in_inode_order(actions[Action.COPY_FILE], source_entries)],
+            n_threads,
+            datapoints_per_future=operations_per_thread,
+            collect_results=False,
+            executer=executer,
+        )
 
     logging.info(
         f"Finished syncing {source_folder} to {target_folder} in {time.time() - start_time:.2f} seconds"
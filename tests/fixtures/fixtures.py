@@ -1,42 +1,124 @@
 from pathlib import Path
 import shutil
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Iterator, Union, Optional
 import os
+import concurrent.futures
+import hashlib
+import itertools
 
 import pytest
 
 TEST_DATA = Path(__file__).parent
-TEST_FOLDERS = [
-    p.name for p in TEST_DATA.iterdir() if p.is_dir() and p.name != "__pycache__"
-]
-ALL_FOLDER_COMBINATIONS = [
-    (source_folder, target_folder)
-    for source_folder in TEST_FOLDERS
-    for target_folder in TEST_FOLDERS
-]
-
-
-def setup_folder(name: str, root: Path) -> Path:
-    shutil.copytree(TEST_DATA / name, root / name)
-    for path in (root / name).rglob(".gitkeep"):
-        path.unlink()
-
-    return root / name
+with os.scandir(TEST_DATA) as entries:
+    # sorted so that every pytest-xdist worker collects the tests in the same order
+    TEST_FOLDERS = tuple(
+        sorted(
+            e.name
+            for e in entries
+            if e.is_dir(follow_symlinks=False) and e.name != "__pycache__"
+        )
+    )
+ALL_FOLDER_COMBINATIONS = tuple(itertools.product(TEST_FOLDERS, repeat=2))
+
+
+def walk_folder(root: Union[str, Path]) -> Iterator[os.DirEntry]:
+    """Yields the entries of all paths inside a folder (like root.rglob("*")) using os.scandir,
+    whose entries cache the file type and stat result."""
+    folders = [root]
+    while folders:
+        with os.scandir(folders.pop()) as it:
+            for entry in it:
+                yield entry
+                if entry.is_dir(follow_symlinks=False):
+                    folders.append(entry.path)
+
+
+@pytest.fixture(scope="session")
+def canonical_folders(tmp_path_factory: pytest.TempPathFactory) -> Dict[str, Path]:
+    # the test folders without their .gitkeep files are set up once per session,
+    # the folders of the single tests are copied from them
+    # with pytest-xdist every worker has its own session and base temp folder
+    root = tmp_path_factory.mktemp("canonical_folders")
+    folders = {}
+    for name in TEST_FOLDERS:
+        shutil.copytree(TEST_DATA / name, root / name)
+        for entry in list(walk_folder(root / name)):
+            if entry.name == ".gitkeep":
+                os.unlink(entry.path)
+        folders[name] = root / name
+
+    return folders
+
+
+def file_digest(path: Union[str, Path]) -> bytes:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+
+    return digest.digest()
+
+
+def folder_metadata(
+    root: Union[str, Path],
+) -> Dict[str, Optional[Tuple[int, float, bytes]]]:
+    # maps the relative paths to the size, modification time and digest of the files,
+    # folders are mapped to None
+    metadata = {}
+    for entry in walk_folder(root):
+        path_rel = os.path.relpath(entry.path, root)
+        if entry.is_dir(follow_symlinks=False):
+            metadata[path_rel] = None
+        else:
+            stat = entry.stat()
+            metadata[path_rel] = (stat.st_size, stat.st_mtime, file_digest(entry.path))
+
+    return metadata
+
+
+@pytest.fixture(scope="session")
+def golden_metadata(
+    canonical_folders: Dict[str, Path],
+) -> Dict[str, Dict[str, Optional[Tuple[int, float, bytes]]]]:
+    # the copies of the test folders keep the modification times of the canonical folders
+    return {name: folder_metadata(path) for name, path in canonical_folders.items()}
+
+
+def _link_or_copy(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def setup_folder(folder: Path, root: Path, hardlink: bool = False) -> Path:
+    # hardlinks are only suitable for folders which are never written to
+    copy_function = _link_or_copy if hardlink else shutil.copy2
+    return Path(
+        shutil.copytree(folder, root / folder.name, copy_function=copy_function)
+    )
 
 
 @pytest.fixture
-def source_folders(
-    request: pytest.FixtureRequest, tmp_path_factory: pytest.TempPathFactory
-) -> Tuple[Path, Path]:
-    return (
-        setup_folder(request.param, tmp_path_factory.mktemp("temp_folder")),
-        setup_folder(request.param, tmp_path_factory.mktemp("temp_folder")),
+def source_folder(
+    request: pytest.FixtureRequest,
+    tmp_path_factory: pytest.TempPathFactory,
+    canonical_folders: Dict[str, Path],
+) -> Path:
+    # changes to the source folder are detected by comparing it with the digests of the
+    # golden metadata, a write through a hardlink also changes the canonical folder
+    return setup_folder(
+        canonical_folders[request.param],
+        tmp_path_factory.mktemp("temp_folder"),
+        hardlink=True,
     )
 
 
 @pytest.fixture
-def target_folder(request: pytest.FixtureRequest, tmp_path: Path) -> Path:
-    return setup_folder(request.param, tmp_path)
+def target_folder(
+    request: pytest.FixtureRequest, tmp_path: Path, canonical_folders: Dict[str, Path]
+) -> Path:
+    return setup_folder(canonical_folders[request.param], tmp_path)
 
 
 def create_empty_folders(root: Path, branching: int, levels: int):
@@ -56,13 +138,31 @@ def empty_folders(request: pytest.FixtureRequest, tmp_path: Path) -> List[Path]:
     return tmp_path
 
 
+def _write_random_file(path: Path, content: bytes, prefix: bytes):
+    with open(path, "wb") as f:
+        f.write(prefix)
+        f.write(memoryview(content)[len(prefix) :])
+
+
 def create_random_files(file_distribution: Dict[int, int], root: Path):
+    paths = []
+    contents = []
+    prefixes = []
     for size, n in file_distribution.items():
         n = int(n)
         size = int(size)
+        # the random content is generated once per size, the index at the start of each file
+        # still makes all files of a size different
+        content = os.urandom(size)
         for i in range(n):
-            with open(root / f"{size//1e3}kb_{i}", "wb") as f:
-                f.write(os.urandom(size))
+            paths.append(root / f"{size//1e3}kb_{i}")
+            contents.append(content)
+            prefixes.append(i.to_bytes(8, "little")[:size])
+
+    # writing the files releases the GIL so threads write them in parallel,
+    # consuming the results raises the errors of the threads
+    with concurrent.futures.ThreadPoolExecutor() as executer:
+        list(executer.map(_write_random_file, paths, contents, prefixes))
 
 
 @pytest.fixture
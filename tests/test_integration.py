@@ -1,4 +1,5 @@
 import logging
+import os
 from pathlib import Path
 
 # import seedir
@@ -7,53 +8,68 @@ import pytest
 from folder_sync import sync_folders
 
 from . import fixtures
-from .fixtures import source_folders, target_folder
-
-
-def assert_identical_folder(folder_a: Path, folder_b: Path):
-    paths_a = folder_a.rglob("*")
-    paths_b = folder_b.rglob("*")
+from .fixtures import (
+    canonical_folders,
+    golden_metadata,
+    source_folder,
+    target_folder,
+)
 
-    paths_a_rel = set([p.relative_to(folder_a) for p in paths_a])
-    paths_b_rel = set([p.relative_to(folder_b) for p in paths_b])
 
-    assert paths_a_rel == paths_b_rel
+def assert_folder_metadata(folder: Path, metadata: dict):
+    entries = {os.path.relpath(e.path, folder): e for e in fixtures.walk_folder(folder)}
 
-    for path_a_rel in paths_a_rel:
-        path_a = folder_a / path_a_rel
-        path_b = folder_b / path_a_rel
+    assert entries.keys() == metadata.keys()
 
-        if path_a.is_file():
-            assert path_b.is_file()
-            assert (
-                path_a.stat().st_mtime == path_b.stat().st_mtime
-            ), f"{path_a} {path_b}"
-            assert path_a.stat().st_size == path_b.stat().st_size
-            assert path_a.read_bytes() == path_b.read_bytes()
+    for path_rel, entry in entries.items():
+        if entry.is_file():
+            assert metadata[path_rel] is not None, entry.path
+            size, mtime, digest = metadata[path_rel]
+            stat = entry.stat()
+            assert stat.st_size == size, entry.path
+            assert stat.st_mtime == mtime, entry.path
+            assert fixtures.file_digest(entry.path) == digest, entry.path
 
-        elif path_a.is_dir():
-            assert path_b.is_dir()
+        elif entry.is_dir():
+            assert metadata[path_rel] is None, entry.path
         else:
-            raise ValueError(f"Unknown path type: {path_a}")
+            raise ValueError(f"Unknown path type: {entry.path}")
 
 
 @pytest.mark.parametrize(
-    "source_folders, target_folder",
+    "source_folder, target_folder",
     fixtures.ALL_FOLDER_COMBINATIONS,
     # [("basic", "changed_data")],
-    indirect=["source_folders", "target_folder"],
+    indirect=["source_folder", "target_folder"],
 )
-def test_sync(source_folders, target_folder, caplog):
-    source_folder, control_source_folder = source_folders
+def test_sync(source_folder, target_folder, golden_metadata, caplog):
+    metadata = golden_metadata[source_folder.name]
 
-    logging.basicConfig(level=logging.INFO)
     caplog.set_level(logging.INFO)
     sync_folders(source_folder, target_folder, quiet=True)
 
-    # print("Control Source")
-    # seedir.seedir(control_source_folder, style="emoji")
+    assert_folder_metadata(target_folder, metadata)
+    # the source folder is hardlinked to the canonical folder, a write into it would
+    # corrupt all later cases and might keep the size and modification time
+    assert_folder_metadata(source_folder, metadata)
+
     # print("Source")
     # seedir.seedir(source_folder, style="emoji")
     # print("Target")
     # seedir.seedir(target_folder, style="emoji")
     # assert False
+
+
+def test_sync_into_symlinked_folder(tmp_path):
+    # the scan doesnt follow the symlinked folder of the target so the existing subfolder is unknown
+    (tmp_path / "source" / "linked" / "sub").mkdir(parents=True)
+    (tmp_path / "source" / "linked" / "sub" / "file.txt").write_text("content")
+    (tmp_path / "linked_folder" / "sub").mkdir(parents=True)
+    (tmp_path / "target").mkdir()
+    (tmp_path / "target" / "linked").symlink_to(tmp_path / "linked_folder")
+
+    sync_folders(tmp_path / "source", tmp_path / "target", quiet=True)
+
+    assert (
+        tmp_path / "target" / "linked" / "sub" / "file.txt"
+    ).read_text() == "content"
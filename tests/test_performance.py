@@ -1,3 +1,4 @@
+import os
 import time
 import shutil
 from pathlib import Path
@@ -11,6 +12,7 @@ from .fixtures import (
     create_empty_folders,
     create_random_files,
     random_files,
+    walk_folder,
 )
 
 
@@ -42,83 +44,76 @@ class TestFixturePerformance:
             iterations=1,
         )
 
-        assert len(list(tmp_path.rglob("*"))) == sum(file_distribution.values())
+        assert len(list(walk_folder(tmp_path))) == sum(file_distribution.values())
 
 
 class TestFileOperationPerformance:
     @pytest.mark.parametrize(
-        "empty_folders, n_threads, datapoints_per_future",
-        [
-            ((10, 4), 10, 1),
-            ((10, 4), 10, 10),
-            ((10, 4), 10, 100),  # this seems to be the sweet spot
-            ((10, 4), 100, 1),
-            ((10, 4), 100, 10),
-            ((10, 4), 100, 100),
-        ],
+        "empty_folders, n_threads",
+        [((10, 4), 1), ((10, 4), 10), ((10, 4), 100)],
         indirect=["empty_folders"],
     )
     def test_benchmark_folder_deletion(
-        self, empty_folders: Path, n_threads: int, datapoints_per_future: int, benchmark
+        self, empty_folders: Path, n_threads: int, benchmark
     ):
         # folder creation takes some time so do not wonder if this takes longer than expected
-        paths = [(p,) for p in empty_folders.rglob("*")]
-        order = [-len(p[0].parts) for p in paths]
+        paths = [(e.path,) for e in walk_folder(empty_folders)]
+        order = [-p.count(os.sep) for p, in paths]
         benchmark.pedantic(
             fs._run_executer_with_progress,
             (
-                lambda p: p.rmdir(),
+                os.rmdir,
                 paths,
                 n_threads,
                 order,
-                datapoints_per_future,
             ),
             rounds=1,
             iterations=1,
         )
 
-        assert len(list(empty_folders.rglob("*"))) == 0
+        assert next(walk_folder(empty_folders), None) is None
+
+    @pytest.mark.parametrize("empty_folders", [(10, 4)], indirect=True)
+    def test_benchmark_rmtree_deletion(self, empty_folders: Path, benchmark):
+        # baseline for the folder deletion above, unlike the executer rmtree has to list the folders again
+        with os.scandir(empty_folders) as it:
+            top_level_folders = [e.path for e in it]
+        benchmark.pedantic(
+            lambda: [shutil.rmtree(p) for p in top_level_folders],
+            rounds=1,
+            iterations=1,
+        )
+
+        assert next(walk_folder(empty_folders), None) is None
 
     @pytest.mark.parametrize(
-        "random_files, n_threads, datapoints_per_future",
+        "random_files, n_threads",
         [
-            ({5e6: 500, 5e3: 500}, 10, 1),
-            ({5e6: 500, 5e3: 500}, 10, 10),
-            ({5e6: 500, 5e3: 500}, 10, 100),
-            ({5e6: 500, 5e3: 500}, 100, 1),
-            ({5e6: 500, 5e3: 500}, 100, 10),
-            ({5e6: 500, 5e3: 500}, 100, 100),
+            ({5e6: 500, 5e3: 500}, 1),
+            ({5e6: 500, 5e3: 500}, 10),
+            ({5e6: 500, 5e3: 500}, 100),
         ],
         indirect=["random_files"],
     )
     def test_benchmark_file_deletion(
-        self, random_files: Path, n_threads: int, datapoints_per_future: int, benchmark
+        self, random_files: Path, n_threads: int, benchmark
     ):
-        paths = [(p,) for p in random_files.rglob("*")]
+        paths = [(e.path,) for e in walk_folder(random_files)]
         benchmark.pedantic(
             fs._run_executer_with_progress,
-            (lambda p: p.unlink(), paths, n_threads),
-            {"datapoints_per_future": datapoints_per_future},
+            (os.unlink, paths, n_threads),
             rounds=1,
             iterations=1,
         )
 
     @pytest.mark.parametrize(
-        "n_folders, n_threads, datapoints_per_future",
-        [
-            (10_000, 10, 1),
-            (10_000, 10, 10),
-            (10_000, 10, 100),
-            (10_000, 100, 1),
-            (10_000, 100, 10),
-            (10_000, 100, 100),
-        ],
+        "n_folders, n_threads",
+        [(10_000, 1), (10_000, 10), (10_000, 100)],
     )
     def test_benchmark_folder_creation(
         self,
         n_folders: int,
         n_threads: int,
-        datapoints_per_future: int,
         tmp_path: Path,
         benchmark,
     ):
@@ -129,27 +124,21 @@ class TestFileOperationPerformance:
                 [(tmp_path / str(i),) for i in range(n_folders)],
                 n_threads,
             ),
-            {"datapoints_per_future": datapoints_per_future},
             rounds=1,
             iterations=1,
         )
 
     @pytest.mark.parametrize(
-        "random_files, n_threads, datapoints_per_future",
+        "random_files, n_threads",
         [
-            ({5e6: 500, 5e3: 500}, 10, 1),
-            ({5e6: 500, 5e3: 500}, 10, 10),
-            ({5e6: 500, 5e3: 500}, 10, 100),
-            ({5e6: 500, 5e3: 500}, 100, 1),
-            ({5e6: 500, 5e3: 500}, 100, 10),
-            ({5e6: 500, 5e3: 500}, 100, 100),
+            ({5e6: 500, 5e3: 500}, 1),
+            ({5e6: 500, 5e3: 500}, 10),
+            ({5e6: 500, 5e3: 500}, 100),
         ],
         indirect=["random_files"],
     )
-    def test_benchmark_file_copy(
-        self, random_files: Path, n_threads: int, datapoints_per_future: int, benchmark
-    ):
-        source_paths = [(p,) for p in random_files.rglob("*")]
+    def test_benchmark_file_copy(self, random_files: Path, n_threads: int, benchmark):
+        source_paths = [(e.path,) for e in walk_folder(random_files)]
         target_path = random_files / "copied"
         target_path.mkdir()
 
@@ -160,7 +149,6 @@ class TestFileOperationPerformance:
                 source_paths,
                 n_threads,
             ),
-            {"datapoints_per_future": datapoints_per_future},
             rounds=1,
             iterations=1,
         )
@@ -1,45 +1,231 @@
+import concurrent.futures
+import errno
+import io
+import os
 import random
+import sys
 
 import pytest
 
-from folder_sync.folder_sync import _run_executer_with_progress
+from folder_sync.folder_sync import (
+    _run_executer_with_progress,
+    _files_equal,
+    _scan_folder,
+    _copy_file,
+    _in_inode_order,
+)
+
+from .fixtures import TEST_FOLDERS, TEST_DATA
+
+
+@pytest.fixture(scope="module", params=[1_000, 100_000])
+def data(request):
+    return list(range(request.param))
+
+
+@pytest.fixture(scope="module")
+def arguments(data):
+    return list(zip(data))
+
+
+@pytest.fixture(scope="module")
+def order(data):
+    # seeded so that failing orders are reproducible
+    return random.Random(len(data)).choices(range(101), k=len(data))
+
+
+@pytest.fixture(scope="module")
+def executer():
+    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executer:
+        yield executer
 
 
 class TestRunExecuter:
-    def test_normal(self):
-        data = list(range(100_000))
-        assert _run_executer_with_progress(lambda v: v, [(d,) for d in data], 5) == data
+    def test_normal(self, data, arguments):
+        assert _run_executer_with_progress(lambda v: v, arguments, 5) == data
 
-    def test_order(self):
-        data = list(range(100_000))
+    def test_order(self, data, arguments, order, executer):
         assert (
             _run_executer_with_progress(
                 lambda v: v,
-                [(d,) for d in data],
+                arguments,
                 5,
-                order=[random.randint(0, 100) for _ in range(100_000)],
+                order=order,
+                executer=executer,
             )
             == data
         )
 
-    def test_datapoints_per_future(self):
-        data = list(range(100_000))
+    def test_sparse_order(self, executer):
+        data = [3, 2, 1, 0]
+        processed = []
+        _run_executer_with_progress(
+            processed.append,
+            list(zip(data)),
+            5,
+            order=[10**9, 10**6, -5, -(10**9)],
+            collect_results=False,
+            executer=executer,
+        )
+        assert processed == [0, 1, 2, 3]
+
+    def test_datapoints_per_future(self, data, arguments, executer):
         assert (
             _run_executer_with_progress(
-                lambda v: v, [(d,) for d in data], 5, datapoints_per_future=1000
+                lambda v: v,
+                arguments,
+                5,
+                datapoints_per_future=1000,
+                executer=executer,
             )
             == data
         )
 
-    def test_datapoints_per_future_order(self):
-        data = list(range(100_000))
+    def test_datapoints_per_future_order(self, data, arguments, order, executer):
         assert (
             _run_executer_with_progress(
                 lambda v: v,
-                [(d,) for d in data],
+                arguments,
                 5,
-                order=[random.randint(0, 100) for _ in range(100_000)],
+                order=order,
                 datapoints_per_future=1000,
+                executer=executer,
             )
             == data
         )
+
+    def test_no_results(self, data, arguments, executer):
+        processed = []
+        assert (
+            _run_executer_with_progress(
+                processed.append,
+                arguments,
+                5,
+                collect_results=False,
+                executer=executer,
+            )
+            is None
+        )
+        assert sorted(processed) == data
+
+    def test_executer(self, data, arguments, executer):
+        for _ in range(2):
+            # the executer stays usable after each call
+            assert (
+                _run_executer_with_progress(
+                    lambda v: v, arguments, 5, executer=executer
+                )
+                == data
+            )
+
+    def test_process_pool(self):
+        data = list(range(-10_000, 0))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executer:
+            assert _run_executer_with_progress(
+                abs, [(d,) for d in data], 2, executer=executer
+            ) == [abs(d) for d in data]
+
+    def test_terminal(self, monkeypatch):
+        class Terminal(io.StringIO):
+            def isatty(self):
+                return True
+
+        monkeypatch.setattr(sys, "stderr", Terminal())
+        data = list(range(100_000))
+        assert _run_executer_with_progress(lambda v: v, [(d,) for d in data], 5) == data
+        assert "100000/100000" in sys.stderr.getvalue()
+
+
+class TestScanFolder:
+    @pytest.mark.parametrize("folder", TEST_FOLDERS)
+    @pytest.mark.parametrize("n_threads", [1, 4])
+    def test_same_as_rglob(self, folder, n_threads):
+        root = TEST_DATA / folder
+        entries, invalid_entries = _scan_folder(root, n_threads)
+        assert not invalid_entries
+        assert entries.keys() == {str(p.relative_to(root)) for p in root.rglob("*")}
+
+    def test_invalid_types(self, tmp_path):
+        (tmp_path / "folder").mkdir()
+        (tmp_path / "folder" / "broken_link").symlink_to(tmp_path / "missing")
+        entries, invalid_entries = _scan_folder(tmp_path)
+        assert entries.keys() == {"folder"}
+        assert invalid_entries.keys() == {os.path.join("folder", "broken_link")}
+
+
+class TestFilesEqual:
+    def test_identical(self, tmp_path):
+        (tmp_path / "a").write_bytes(b"content")
+        (tmp_path / "b").write_bytes(b"content")
+        assert _files_equal(tmp_path / "a", tmp_path / "b", False)
+
+    def test_different_size(self, tmp_path):
+        (tmp_path / "a").write_bytes(b"content")
+        (tmp_path / "b").write_bytes(b"other content")
+        assert not _files_equal(tmp_path / "a", tmp_path / "b", True)
+
+    def test_shallow(self, tmp_path):
+        (tmp_path / "a").write_bytes(b"content")
+        (tmp_path / "b").write_bytes(b"CONTENT")
+        os.utime(tmp_path / "b", ns=(0, (tmp_path / "a").stat().st_mtime_ns))
+        assert _files_equal(tmp_path / "a", tmp_path / "b", True)
+        assert not _files_equal(tmp_path / "a", tmp_path / "b", False)
+
+
+class TestCopyFile:
+    def test_copy(self, tmp_path):
+        (tmp_path / "a").write_bytes(os.urandom(100_000))
+        _copy_file(tmp_path / "a", tmp_path / "b")
+        assert (tmp_path / "a").read_bytes() == (tmp_path / "b").read_bytes()
+        assert (tmp_path / "a").stat().st_mtime_ns == (
+            tmp_path / "b"
+        ).stat().st_mtime_ns
+
+    def test_copy_file_range_unsupported(self, tmp_path, monkeypatch):
+        def unsupported(*args):
+            raise OSError(errno.EXDEV, "unsupported")
+
+        monkeypatch.setattr(os, "copy_file_range", unsupported, raising=False)
+        (tmp_path / "a").write_bytes(os.urandom(100_000))
+        _copy_file(tmp_path / "a", tmp_path / "b")
+        assert (tmp_path / "a").read_bytes() == (tmp_path / "b").read_bytes()
+
+    def test_copy_file_range_no_data(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(os, "copy_file_range", lambda *args: 0, raising=False)
+        (tmp_path / "a").write_bytes(os.urandom(100_000))
+        _copy_file(tmp_path / "a", tmp_path / "b")
+        assert (tmp_path / "a").read_bytes() == (tmp_path / "b").read_bytes()
+
+    def test_hardlink(self, tmp_path):
+        (tmp_path / "a").write_bytes(os.urandom(100_000))
+        _copy_file(tmp_path / "a", tmp_path / "b", copy_mode="hardlink")
+        assert os.path.samefile(tmp_path / "a", tmp_path / "b")
+
+    def test_reflink(self, tmp_path):
+        # falls back to copying if the filesystem doesnt support reflinks
+        (tmp_path / "a").write_bytes(os.urandom(100_000))
+        _copy_file(tmp_path / "a", tmp_path / "b", copy_mode="reflink")
+        assert (tmp_path / "a").read_bytes() == (tmp_path / "b").read_bytes()
+        assert (tmp_path / "a").stat().st_mtime_ns == (
+            tmp_path / "b"
+        ).stat().st_mtime_ns
+        assert not os.path.samefile(tmp_path / "a", tmp_path / "b")
+
+
+class TestInInodeOrder:
+    def test_posix(self, tmp_path):
+        for name in "abc":
+            (tmp_path / name).touch()
+        entries = {e.name: e for e in os.scandir(tmp_path)}
+        assert _in_inode_order(set(entries), entries) == sorted(
+            entries, key=lambda p: os.stat(tmp_path / p).st_ino
+        )
+
+    def test_not_posix(self, monkeypatch):
+        class Entry:
+            def inode(self):
+                raise AssertionError("inode() needs a system call on this platform")
+
+        monkeypatch.setattr(os, "name", "nt")
+        entries = {"a": Entry(), "b": Entry()}
+        assert sorted(_in_inode_order(set(entries), entries)) == ["a", "b"]